@@ -0,0 +1,210 @@
+import argparse
+import concurrent.futures as cf
+import os
+import statistics
+import sys
+import time
+from os import path
+from typing import Iterator, List, NamedTuple, Optional
+
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), "lab1"))
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), "lab2"))
+
+import cardan_grille as cg  # noqa: E402
+import rijndael  # noqa: E402
+
+ENCODED_SUFFIX = ".enc"
+DECODED_SUFFIX = ".dec"
+
+RIJNDAEL = "rijndael"
+CARDAN = "cardan"
+CIPHERS = (RIJNDAEL, CARDAN)
+
+ENCRYPT = "encrypt"
+DECRYPT = "decrypt"
+VERIFY = "verify"
+OPERATIONS = (ENCRYPT, DECRYPT, VERIFY)
+
+BUFFER_SIZE = 1 << 20
+
+
+class Result(NamedTuple):
+    path: str
+    size: int
+    seconds: float
+    error: Optional[str]
+
+
+def make_cipher(name: str, key: bytes, iv: bytes, mode: str):
+    if name == RIJNDAEL:
+        # files are already processed in parallel, so each cipher uses one process
+        return rijndael.Rijndael(key, iv, mode)
+    return cg.CardanGrille(cg.DEFAULT_MASK, cg.DEFAULT_TRANSFORMATIONS)
+
+
+def decoded_path(file: str) -> str:
+    if file.endswith(ENCODED_SUFFIX):
+        file = file[: -len(ENCODED_SUFFIX)]
+    return file + DECODED_SUFFIX
+
+
+def error_message(e: Exception) -> str:
+    return f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+
+
+def process_file(
+    file: str, cipher_name: str, op: str, key: bytes, iv: bytes, mode: str
+) -> Result:
+    """
+    Applies `op` to a single file and measures the time spent on it.
+    Encryption writes `<file>.enc`, decryption writes `<file>.dec`
+    and verification only checks that decrypted data matches the source.
+    """
+    start = time.perf_counter()
+    try:
+        cipher = make_cipher(cipher_name, key, iv, mode)
+        with open(file, "rb", buffering=BUFFER_SIZE) as f:
+            data = f.read()
+
+        # output is opened only after processing succeeded,
+        # so failed files don't leave empty outputs
+        if op == ENCRYPT:
+            out = cipher.encrypt(data)
+            with open(file + ENCODED_SUFFIX, "wb", buffering=BUFFER_SIZE) as f:
+                f.write(out)
+        elif op == DECRYPT:
+            out = cipher.decrypt(data)
+            with open(decoded_path(file), "wb", buffering=BUFFER_SIZE) as f:
+                f.write(out)
+        elif cipher.decrypt(cipher.encrypt(data)) != data:
+            raise ValueError("decrypted data differs from source")
+    except Exception as e:
+        # a single malformed file must not stop the whole batch
+        return Result(file, 0, time.perf_counter() - start, error_message(e))
+    return Result(file, len(data), time.perf_counter() - start, None)
+
+
+def collect_files(paths: List[str], op: str) -> Iterator[str]:
+    """
+    Yields files from `paths` walking directories recursively.
+    Decryption takes only `.enc` files from directories, other operations
+    skip files produced by previous runs.
+    """
+
+    def selected(file: str) -> bool:
+        if op == DECRYPT:
+            return file.endswith(ENCODED_SUFFIX)
+        return not file.endswith((ENCODED_SUFFIX, DECODED_SUFFIX))
+
+    for p in paths:
+        if not path.isdir(p):
+            yield p
+            continue
+        for root, _, files in os.walk(p):
+            for name in sorted(files):
+                if selected(name):
+                    yield path.join(root, name)
+
+
+def collect_result(file: str, future: cf.Future) -> Result:
+    """
+    Returns result of `future`, recording failures of the pool itself
+    (e.g. a crashed worker process) as a failed file.
+    """
+    try:
+        return future.result()
+    except Exception as e:
+        return Result(file, 0, 0.0, error_message(e))
+
+
+def print_stats(results: List[Result], seconds: float):
+    failed = [r for r in results if r.error is not None]
+    for r in failed:
+        print(f"failed: {r.path}: {r.error}", file=sys.stderr)
+
+    total = sum(r.size for r in results)
+    print(f"files: {len(results)}, failed: {len(failed)}")
+    print(f"bytes: {total}, time: {seconds:.3f} s")
+    if seconds > 0:
+        print(f"throughput: {total / seconds / 1e6:.3f} MB/s")
+
+    # failed files often fail fast and would skew the latencies
+    latencies = sorted(r.seconds * 1e3 for r in results if r.error is None)
+    if not latencies:
+        return
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(
+        "latency, ms: "
+        f"min={latencies[0]:.3f} "
+        f"mean={statistics.mean(latencies):.3f} "
+        f"p50={statistics.median(latencies):.3f} "
+        f"p95={p95:.3f} "
+        f"max={latencies[-1]:.3f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "paths", nargs="+", help="files or directories which will be processed"
+    )
+    parser.add_argument("-c", "--cipher", choices=CIPHERS, default=RIJNDAEL)
+    parser.add_argument(
+        "-o",
+        "--op",
+        choices=OPERATIONS,
+        default=VERIFY,
+        help="operation applied to each file; rijndael in OFB mode and cardan "
+        "drop NUL bytes on decryption, so files containing them are restored "
+        "only with rijndael in CBC mode (verify reports such files as failed)",
+    )
+    parser.add_argument(
+        "-m",
+        "--mode",
+        choices=rijndael.Rijndael.MODES,
+        default=rijndael.Rijndael.OFB,
+        help="block cipher mode of operation for rijndael",
+    )
+    parser.add_argument("-k", "--key", help="hex encoded key for rijndael")
+    parser.add_argument("--iv", help="hex encoded iv for rijndael")
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="number of files processed concurrently",
+    )
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        parser.error("workers must be positive")
+
+    try:
+        key = bytes.fromhex(args.key) if args.key else None
+        iv = bytes.fromhex(args.iv) if args.iv else None
+    except ValueError as e:
+        parser.error(f"invalid hex: {e}")
+    if args.cipher == RIJNDAEL and (key is None or iv is None):
+        if args.op == DECRYPT:
+            parser.error("rijndael decryption requires --key and --iv")
+        key = key or os.urandom(16)
+        iv = iv or os.urandom(len(key))
+        print(f"key: {key.hex()}, iv: {iv.hex()}")
+
+    try:
+        make_cipher(args.cipher, key, iv, args.mode)
+    except ValueError as e:
+        parser.error(str(e))
+
+    files = list(collect_files(args.paths, args.op))
+    start = time.perf_counter()
+    with cf.ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            executor.submit(process_file, f, args.cipher, args.op, key, iv, args.mode)
+            for f in files
+        ]
+        results = [collect_result(f, fut) for f, fut in zip(files, futures)]
+    print_stats(results, time.perf_counter() - start)
+
+    if any(r.error is not None for r in results):
+        sys.exit(1)
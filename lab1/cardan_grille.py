@@ -131,6 +131,20 @@ class CardanGrille:
         return grille
 
 
+DEFAULT_MASK = [
+    [True, False, True, False],
+    [False, False, False, False],
+    [False, True, False, True],
+    [False, False, False, False],
+]
+DEFAULT_TRANSFORMATIONS = [
+    mirror_horizontally,
+    mirror_vertically,
+    mirror_horizontally,
+    mirror_vertically,
+]
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -141,19 +155,7 @@ if __name__ == "__main__":
     )
     args = parser.parse_args()
 
-    mask = [
-        [True, False, True, False],
-        [False, False, False, False],
-        [False, True, False, True],
-        [False, False, False, False],
-    ]
-    transformations = [
-        mirror_horizontally,
-        mirror_vertically,
-        mirror_horizontally,
-        mirror_vertically,
-    ]
-    cardan = CardanGrille(mask, transformations)
+    cardan = CardanGrille(DEFAULT_MASK, DEFAULT_TRANSFORMATIONS)
 
     with open(args.file, "rb") as f:
         encrypted = cardan.encrypt(f.read())
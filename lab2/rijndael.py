@@ -1,22 +1,115 @@
 import argparse
+import concurrent.futures as cf
 import copy
+import functools
+import json
 import os
-from typing import List
+import time
+from typing import Callable, Dict, List, Optional, Tuple
 
 Int2DMatrix = List[List[int]]
 
 
+class Profiler:
+    """
+    Collects call counts and cumulative time of `Rijndael` stages per mode.
+
+    Times are inclusive: time of `_encrypt_block` also contains time
+    of the stages called from it.
+    """
+
+    def __init__(self):
+        self.calls: Dict[Tuple[str, str], int] = {}
+        self.nanos: Dict[Tuple[str, str], int] = {}
+
+    def wrap(self, mode: str, stage: str, fn: Callable) -> Callable:
+        key = (mode, stage)
+        self.calls.setdefault(key, 0)
+        self.nanos.setdefault(key, 0)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.nanos[key] += time.perf_counter_ns() - start
+                self.calls[key] += 1
+
+        return wrapper
+
+    def summary(self) -> str:
+        """
+        Returns stats as a table sorted by cumulative time.
+        """
+        lines = [
+            f"{'mode':<6}{'stage':<18}{'calls':>12}"
+            f"{'total, ms':>14}{'per call, ns':>16}"
+        ]
+        for (mode, stage), nanos in sorted(self.nanos.items(), key=lambda kv: -kv[1]):
+            calls = self.calls[(mode, stage)]
+            if calls == 0:
+                continue
+            total_ms = nanos / 1e6
+            per_call = nanos // calls
+            lines.append(
+                f"{mode:<6}{stage:<18}{calls:>12}{total_ms:>14.3f}{per_call:>16}"
+            )
+        return "\n".join(lines)
+
+    def to_json(self) -> str:
+        stats = {}
+        for (mode, stage), calls in self.calls.items():
+            if calls == 0:
+                continue
+            stats.setdefault(mode, {})[stage] = {
+                "calls": calls,
+                "nanos": self.nanos[(mode, stage)],
+            }
+        return json.dumps(stats, indent=2)
+
+
 class Rijndael:
     """
-    An implementation of Rijndael algorithm with OFB mode.
+    An implementation of Rijndael algorithm with OFB and CBC modes.
 
     See Also:
         - https://autonome-antifa.org/IMG/pdf/Rijndael.pdf
         - https://medium.com/quick-code/understanding-the-advanced-encryption-standard-7d7884277e7
         - https://csrc.nist.gov/csrc/media/projects/cryptographic-standards-and-guidelines/documents/aes-development/rijndael-ammended.pdf
         - https://en.wikipedia.org/wiki/Block_cipher_mode_of_operation#Output_feedback_(OFB)
+        - https://en.wikipedia.org/wiki/Block_cipher_mode_of_operation#Cipher_block_chaining_(CBC)
     """
 
+    OFB = "ofb"
+    CBC = "cbc"
+    MODES = (OFB, CBC)
+
+    # smaller CBC inputs are decrypted serially, because starting
+    # a process pool costs more than decrypting them
+    MIN_BLOCKS_PER_WORKER = 1024
+
+    # methods which are timed when profiler is attached
+    STAGES = (
+        "encrypt",
+        "decrypt",
+        "_encrypt_block",
+        "_decrypt_block",
+        "sub_bytes",
+        "inv_sub_bytes",
+        "shift_rows",
+        "inv_shift_rows",
+        "mix_columns",
+        "inv_mix_columns",
+        "add_round_key",
+        "_to_matrix",
+        "_flat",
+        "_pad",
+        "_unpad",
+        "_pad_pkcs7",
+        "_unpad_pkcs7",
+    )
+
     # fmt: off
     Sbox = (
         0x63, 0x7C, 0x77, 0x7B, 0xF2, 0x6B, 0x6F, 0xC5, 0x30, 0x01, 0x67, 0x2B, 0xFE, 0xD7, 0xAB, 0x76,
@@ -57,9 +150,20 @@ class Rijndael:
         0x17, 0x2B, 0x04, 0x7E, 0xBA, 0x77, 0xD6, 0x26, 0xE1, 0x69, 0x14, 0x63, 0x55, 0x21, 0x0C, 0x7D,
     )
 
-    def __init__(self, key: bytes, iv: bytes):
+    def __init__(
+        self,
+        key: bytes,
+        iv: bytes,
+        mode: str = OFB,
+        workers: int = 1,
+        profiler: Optional[Profiler] = None,
+    ):
         if len(key) != len(iv):
             raise ValueError("length of key and iv must be equal")
+        if mode not in self.MODES:
+            raise ValueError(f"mode must be one of: {list(self.MODES)}")
+        if workers < 1:
+            raise ValueError("workers must be positive")
 
         nk = len(key)
         block_size = 128
@@ -78,15 +182,45 @@ class Rijndael:
         self.nb = block_size // 32
         self.iv = self._to_matrix(iv)
         self.key = self._to_matrix(key)
+        self.mode = mode
+        # number of processes used for CBC decryption
+        self.workers = workers
+
+        # stages are wrapped on the instance only, so without
+        # profiler the methods are called directly
+        self.profiler = profiler
+        if profiler is not None:
+            for stage in self.STAGES:
+                setattr(self, stage, profiler.wrap(mode, stage, getattr(self, stage)))
+
+    def __getstate__(self):
+        # wrapped stages can't be pickled, so copies of profiled
+        # instances are not profiled
+        state = self.__dict__.copy()
+        if state.pop("profiler", None) is not None:
+            for stage in self.STAGES:
+                state.pop(stage)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.profiler = None
 
     def encrypt(self, data: bytes) -> bytes:
         """
         Encrypts data by blocks with adding padding if necessary.
-        Each block is encrypted with OFB mode.
+        Each block is encrypted with the mode chosen on construction.
+        """
+        if self.mode == self.CBC:
+            return self._encrypt_cbc(data)
+        return self._encrypt_ofb(data)
+
+    def _encrypt_ofb(self, data: bytes) -> bytes:
+        """
+        Encrypts data by blocks with OFB mode.
         """
         block_size = 16
-        padding = block_size - len(data) % block_size
-        data += b"\x00" * padding
+        data = self._pad(data)
 
         res = []
         last_block = copy.deepcopy(self.iv)
@@ -100,6 +234,25 @@ class Rijndael:
 
         return bytes(res)
 
+    def _encrypt_cbc(self, data: bytes) -> bytes:
+        """
+        Encrypts data by blocks with CBC mode and PKCS#7 padding.
+        """
+        block_size = 16
+        data = self._pad_pkcs7(data)
+
+        res = []
+        last_block = copy.deepcopy(self.iv)
+        for off in range(0, len(data), block_size):
+            block = self._to_matrix(data[off : off + block_size])
+            # xor plaintext with previous ciphertext block
+            self.add_round_key(block, last_block)
+            self._encrypt_block(block)
+            res.extend(self._flat(block))
+            last_block = block
+
+        return bytes(res)
+
     def _encrypt_block(self, block: Int2DMatrix):
         self.add_round_key(block, self.key)
         for i in range(self.nr - 1):
@@ -114,7 +267,15 @@ class Rijndael:
     def decrypt(self, data: bytes) -> bytes:
         """
         Decrypts data by blocks with discarding padding if necessary.
-        Each block is decrypted with OFB mode.
+        Each block is decrypted with the mode chosen on construction.
+        """
+        if self.mode == self.CBC:
+            return self._decrypt_cbc(data)
+        return self._decrypt_ofb(data)
+
+    def _decrypt_ofb(self, data: bytes) -> bytes:
+        """
+        Decrypts data by blocks with OFB mode.
         """
         res = []
         block_size = 16
@@ -124,13 +285,100 @@ class Rijndael:
             block = self._to_matrix(data[:block_size])
             # xor ciphertext with previous block
             self.add_round_key(block, last_block)
-            for b in self._flat(block):
-                if b == 0:
-                    break
-                res.append(b)
+            self._unpad(block, res)
             data = data[block_size:]
         return bytes(res)
 
+    def _decrypt_cbc(self, data: bytes) -> bytes:
+        """
+        Decrypts data by blocks with CBC mode and discards PKCS#7 padding.
+
+        Decryption of a block depends only on the ciphertext, so large data
+        is split into `workers` chunks which are decrypted in separate processes.
+        Profiled instances decrypt in the current process, otherwise stages run
+        in the workers would be missing from the profile.
+        """
+        block_size = 16
+        blocks = len(data) // block_size
+        iv = bytes(self._flat(self.iv))
+        serial = self.workers == 1 or self.profiler is not None
+        if serial or blocks < self.workers * self.MIN_BLOCKS_PER_WORKER:
+            plain = self._decrypt_cbc_chunk(data[: blocks * block_size], iv)
+            return self._unpad_pkcs7(plain)
+
+        per_chunk = -(-blocks // self.workers) * block_size
+        chunks, prevs = [], []
+        for off in range(0, blocks * block_size, per_chunk):
+            chunks.append(data[off : off + per_chunk])
+            # each chunk is chained to the last ciphertext block of the previous one
+            prevs.append(data[off - block_size : off] if off else iv)
+
+        with cf.ProcessPoolExecutor(max_workers=self.workers) as executor:
+            plain = b"".join(executor.map(self._decrypt_cbc_chunk, chunks, prevs))
+        return self._unpad_pkcs7(plain)
+
+    def _decrypt_cbc_chunk(self, data: bytes, prev: bytes) -> bytes:
+        """
+        Decrypts consecutive CBC blocks of `data`, where `prev` is
+        the ciphertext block preceding the first one.
+        """
+        res = []
+        block_size = 16
+        last_block = self._to_matrix(prev)
+        for off in range(0, len(data), block_size):
+            cipher = self._to_matrix(data[off : off + block_size])
+            block = copy.deepcopy(cipher)
+            self._decrypt_block(block)
+            # xor decrypted block with previous ciphertext block
+            self.add_round_key(block, last_block)
+            res.extend(self._flat(block))
+            last_block = cipher
+        # bytes are much cheaper to send back from worker process than list of ints
+        return bytes(res)
+
+    def _pad(self, data: bytes) -> bytes:
+        """
+        Pads `data` with zero bytes up to a multiple of block size.
+        """
+        block_size = 16
+        padding = block_size - len(data) % block_size
+        return data + b"\x00" * padding
+
+    def _unpad(self, block: Int2DMatrix, res: List[int]):
+        """
+        Appends bytes of decrypted `block` to `res` up to the first zero byte.
+        """
+        for b in self._flat(block):
+            if b == 0:
+                break
+            res.append(b)
+
+    def _pad_pkcs7(self, data: bytes) -> bytes:
+        """
+        Pads `data` up to a multiple of block size with bytes equal
+        to the padding length, so any data can be restored exactly.
+
+        See Also:
+            - https://datatracker.ietf.org/doc/html/rfc5652#section-6.3
+        """
+        block_size = 16
+        padding = block_size - len(data) % block_size
+        return data + bytes([padding]) * padding
+
+    def _unpad_pkcs7(self, data: bytes) -> bytes:
+        """
+        Discards padding added by `_pad_pkcs7` from the end of `data`.
+        """
+        block_size = 16
+        if not data or len(data) % block_size != 0:
+            raise ValueError("data length must be a positive multiple of block size")
+        padding = data[-1]
+        if not 1 <= padding <= block_size:
+            raise ValueError("invalid padding, check key and iv")
+        if data[-padding:] != bytes([padding]) * padding:
+            raise ValueError("invalid padding, check key and iv")
+        return data[:-padding]
+
     def _decrypt_block(self, block: Int2DMatrix):
         self.add_round_key(block, self.key)
         for i in range(self.nr - 1):
@@ -259,11 +507,32 @@ if __name__ == "__main__":
         required=True,
         help="path to file which will be encrypted and then decrypted",
     )
+    parser.add_argument(
+        "-m",
+        "--mode",
+        choices=Rijndael.MODES,
+        default=Rijndael.OFB,
+        help="block cipher mode of operation",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="number of processes used for CBC decryption",
+    )
+    parser.add_argument(
+        "-p",
+        "--profile",
+        choices=["table", "json"],
+        help="print time spent in each stage in specified format",
+    )
     args = parser.parse_args()
 
     key = os.urandom(16)
     iv = os.urandom(16)
-    aes = Rijndael(key, iv)
+    profiler = Profiler() if args.profile else None
+    aes = Rijndael(key, iv, args.mode, args.workers, profiler)
 
     with open(args.file, "rb") as f:
         encrypted = aes.encrypt(f.read())
@@ -272,3 +541,8 @@ if __name__ == "__main__":
 
         with open(args.file + ".dec", "wb") as df:
             df.write(aes.decrypt(encrypted))
+
+    if args.profile == "table":
+        print(profiler.summary())
+    elif args.profile == "json":
+        print(profiler.to_json())
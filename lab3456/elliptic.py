@@ -1,5 +1,5 @@
 import dataclasses
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 
 @dataclasses.dataclass
@@ -16,6 +16,7 @@ class Point:
 
 
 CipherPoint = Tuple[Point, Point]
+Term = Tuple[Optional[Point], int]
 
 
 class Calculator:
@@ -58,7 +59,7 @@ class Calculator:
         if self.log:
             print(f"decrypt_point: C={cipher}, n_b={self.private_key}")
 
-        pt = self.sub(pt2, self.times(pt1, self.private_key))
+        pt = self.multi_times([(pt2, 1), (pt1, -self.private_key)])
         if self.log:
             print(f"decrypt_point: P={pt}")
             print("-" * 80)
@@ -114,6 +115,42 @@ class Calculator:
 
         return res
 
+    def multi_times(self, terms: List[Term]) -> Optional[Point]:
+        """
+        Computes linear combination `n1*P1 + n2*P2 + ...` of `terms`
+        using Straus-Shamir simultaneous multiplication: bits of all factors
+        are scanned together from the most significant one, so doublings
+        are shared across all terms. Negative factors negate the point.
+
+        See Also:
+            - https://en.wikipedia.org/wiki/Elliptic_curve_point_multiplication#Straus-Shamir_trick
+        """
+        if self.log:
+            print(f"multi_times: sum(P*n): terms={terms}")
+
+        pts = []
+        factors = []
+        for pt, n in terms:
+            if pt is None or n == 0:
+                continue
+            if n < 0:
+                pt, n = Point(pt.x, -pt.y % self.curve.p), -n
+            pts.append(pt)
+            factors.append(n)
+
+        res = None
+        bits = max((n.bit_length() for n in factors), default=0)
+        for i in range(bits - 1, -1, -1):
+            res = self.sum(res, res)
+            for pt, n in zip(pts, factors):
+                if (n >> i) & 1 == 1:
+                    res = self.sum(res, pt)
+
+        if self.log:
+            print(f"multi_times: sum(P*n) = {res}")
+
+        return res
+
     def sum(self, pt1: Optional[Point], pt2: Optional[Point]) -> Optional[Point]:
         if self.log:
             print(f"sum: P1+P2: P1={pt1}, P2={pt2}")
@@ -125,7 +162,7 @@ class Calculator:
             # P1 + O = P1
             return pt1
 
-        if pt1.x == pt2.x and pt1.y != pt2.y:
+        if pt1.x == pt2.x and (pt1.y != pt2.y or pt1.y == 0):
             # P - P = O
             return None
 